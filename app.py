@@ -223,7 +223,8 @@ async def run_single_simulation(algo, n, m, bad_nodes):
         result = await runner.run_single(config, save=True)
         
         output_text = f"Success: {result.success}\n"
-        output_text += f"Time: {result.consensus_time:.4f}s\n"
+        output_text += f"Simulated Time: {result.consensus_time:.4f}s\n"
+        output_text += f"Wall Time: {result.wall_time:.4f}s\n"
         output_text += f"Total Messages: {result.total_messages}\n"
         output_text += f"Decided Value: {result.decided_value}\n"
         if result.byzantine_nodes:
@@ -21,13 +21,20 @@ class Repository:
                 m INTEGER,
                 actual_byzantine INTEGER,
                 success BOOLEAN,
-                consensus_time REAL,
+                consensus_time REAL, -- simulated seconds until the decision
                 total_messages INTEGER,
                 messages_per_phase TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                wall_time REAL -- real seconds spent simulating
             )
         """)
         
+        # Databases created before wall_time was tracked: their consensus_time rows
+        # hold real seconds and keep wall_time NULL, which tells them apart
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(runs)")]
+        if "wall_time" not in columns:
+            cursor.execute("ALTER TABLE runs ADD COLUMN wall_time REAL")
+        
         conn.commit()
         conn.close()
 
@@ -36,8 +43,8 @@ class Repository:
         cursor = conn.cursor()
         
         cursor.execute("""
-            INSERT INTO runs (algorithm, n, m, actual_byzantine, success, consensus_time, total_messages, messages_per_phase)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO runs (algorithm, n, m, actual_byzantine, success, consensus_time, total_messages, messages_per_phase, wall_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             config.algorithm,
             config.n,
@@ -46,7 +53,8 @@ class Repository:
             result.success,
             result.consensus_time,
             result.total_messages,
-            json.dumps(result.messages_per_phase)
+            json.dumps(result.messages_per_phase),
+            result.wall_time
         ))
         
         conn.commit()
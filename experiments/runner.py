@@ -45,7 +45,8 @@ class ExperimentRunner:
                         algorithm=algo,
                         n=n,
                         m=m,
-                        actual_byzantine=f_count
+                        actual_byzantine=f_count,
+                        verbose=False
                     )
                     res = await self.run_single(config, save=True)
                     if res.success: success_count += 1
@@ -70,7 +71,7 @@ class ExperimentRunner:
         results = []
         for n in n_range:
             for algo in ["PBFT", "NBFT"]:
-                config = RunConfig(algorithm=algo, n=n, m=m, actual_byzantine=0)
+                config = RunConfig(algorithm=algo, n=n, m=m, actual_byzantine=0, verbose=False)
                 res = await self.run_single(config)
                 results.append({
                     "Algorithm": algo,
@@ -48,8 +48,7 @@ class ByzantineBehavior:
 
         elif strategy == "random_noise":
              # Just sends garbage data
-             message.content = "GARBAGE"
-             return message
+             return replace(message, content="GARBAGE")
              
         # Fallback: act honest if strategy unknown
         return message
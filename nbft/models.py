@@ -1,4 +1,5 @@
 from dataclasses import dataclass, field
+from functools import lru_cache
 from enum import Enum, auto
 from typing import List, Optional, Dict, Any, Set
 import time
@@ -44,9 +45,17 @@ class ConsensusState(Enum):
     COMMITTED = auto()
     DECIDED = auto() # NBFT specific
 
+#  Signatures 
+
+@lru_cache(maxsize=4096)
+def _signature(content: str, node_id: int) -> str:
+    # Simple simulated signature: H(content + node_secret)
+    # Cached because every recipient of a broadcast checks the same (digest, signer) pair
+    return hashlib.sha256(f"{content}_SECRET_{node_id}".encode()).hexdigest()
+
 #  Core Data Models 
 
-@dataclass
+@dataclass(slots=True)
 class Node:
     """
     Represents a single participant in the network.
@@ -65,10 +74,11 @@ class Node:
     def __hash__(self):
         return self.node_id
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Message:
     """
     A network message
+    Immutable, so one instance can be shared by every recipient of a broadcast.
     """
     msg_type: MsgType
     sender_id: int
@@ -84,16 +94,14 @@ class Message:
     @staticmethod
     def sign(content: str, node_id: int) -> str:
         """Simulates signing content with node's private key."""
-        # Simple simulated signature: H(content + node_secret)
-        return hashlib.sha256(f"{content}_SECRET_{node_id}".encode()).hexdigest()
+        return _signature(content, node_id)
 
     @staticmethod
     def verify(content: str, signature: str, node_id: int) -> bool:
         """Verifies signature matches the expected public key owner."""
-        expected = hashlib.sha256(f"{content}_SECRET_{node_id}".encode()).hexdigest()
-        return signature == expected
+        return signature == _signature(content, node_id)
 
-@dataclass
+@dataclass(slots=True)
 class Vote:
     """
     NBFT specific: A condensed vote sent from group members to representatives.
@@ -118,7 +126,7 @@ class Group:
     def size(self):
         return len(self.members)
 
-@dataclass
+@dataclass(slots=True)
 class RunConfig:
     """
     Configuration for a single simulation run.
@@ -129,6 +137,14 @@ class RunConfig:
     f: int = 0 # Max Byzantine nodes tolerance
     actual_byzantine: int = 0 # Actual number of bad nodes injected
     client_requests: int = 1
+    verbose: bool = True # Collect detailed logs (disable for batch experiments)
+    latency: float = 0.001 # Simulated one-way message delay (seconds)
+    seed: Optional[int] = None # Seeds Byzantine node selection (None = fresh randomness each run)
+
+    def __post_init__(self):
+        # Timers are measured in hops of this delay, so it has to move simulated time forward
+        if self.latency <= 0:
+            raise ValueError("latency must be > 0")
 
 @dataclass
 class RunResult:
@@ -143,3 +159,4 @@ class RunResult:
     logs: List[str]
     message_trace: List[Dict[str, Any]] = field(default_factory=list)
     byzantine_nodes: List[int] = field(default_factory=list)
+    wall_time: float = 0.0 # Real seconds spent in run(); consensus_time is simulated
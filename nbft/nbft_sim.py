@@ -1,13 +1,39 @@
 from typing import List
-import asyncio
+from dataclasses import replace
+from array import array
+import heapq
 import time
-import collections
 from .models import Node, Message, MsgType, RunConfig, RunResult, ConsensusState
 from .consistent_hash import ConsistentHashing
 from .byzantine import ByzantineBehavior
 from .analysis import Analysis
 import random
 
+# Votes that can no longer change the outcome once consensus has been reached
+_LATE_VOTE_TYPES = (MsgType.IN_PREPARE1, MsgType.OUT_PREPARE, MsgType.COMMIT)
+
+# Protocol timers in message hops, scaled by RunConfig.latency so a slow network does not trip them
+# (0.5 s watchdog, 3 s view timeout and 0.1 s reply grace period at the default 1 ms per hop)
+_WATCHDOG_HOPS = 500
+_VIEW_TIMEOUT_HOPS = 3000
+_GRACE_HOPS = 100
+
+def _new_state() -> dict:
+    """Fresh per-(node, view, seq) protocol state."""
+    return {
+        "in_prepare1_mask": 0,      # Rep collecting from members (bit per sender id)
+        "in_prepare1_count": 0,
+        "out_prepare_votes": {},    # Rep collecting from other nodes (NodeID -> Weight)
+        "out_prepare_weight": 0,    # Running sum of out_prepare_votes
+        "commit_mask": 0,           # Global Primary collecting from Reps (bit per sender id)
+        "commit_count": 0,
+        "state": ConsensusState.IDLE,
+        "intra_group_done": False,
+        "inter_group_done": False,
+        "watchdog_triggered": False,
+        "proposal_value": None
+    }
+
 class NBFTSimulator:
     """
     Implements the two-level consensus mechanism:
@@ -16,13 +42,22 @@ class NBFTSimulator:
     """
     def __init__(self, config: RunConfig):
         self.config = config
+        self.verbose = config.verbose
+        # Global weighted quorum for out-prepare: more than 2n/3 of the network's weight
+        self._quorum_weight = (2 * config.n) // 3
+        # Timer lengths in simulated seconds
+        self._watchdog_delay = _WATCHDOG_HOPS * config.latency
+        self._view_timeout = _VIEW_TIMEOUT_HOPS * config.latency
         self.global_time = 0.0
         self.logs = []
         
+        # Per-run RNG so a fixed config.seed reproduces the same Byzantine selection
+        self._rng = random.Random(config.seed)
         self.nodes = self._setup_nodes()
         self.ch = ConsistentHashing(self.nodes, config.m)
         self.previous_hash = "0" * 64
         self.prev_primary_id = None
+        self.reps = ()
         # Form Groups & Identify Reps for View 0
         self._setup_view(0)
         
@@ -30,20 +65,42 @@ class NBFTSimulator:
         # Re-apply strategy based on INITIAL view. 
         self._apply_byzantine_strategies()
         
-        # node_id -> state dict
-        self.node_states = {n.node_id: {} for n in self.nodes}
-        self.trace = [] # Store (time, sender, receiver, msg_type)
+        # (node_id, view, seq) -> state dict, created lazily on a node's first message
+        self.state = {}
+        # Message trace stored column-wise (time, arrival, sender, receiver, msg_type value);
+        # rows are only built as dicts for RunResult.message_trace
+        self._trace_time = array('d')
+        self._trace_arrival = array('d')
+        self._trace_sender = array('i')
+        self._trace_receiver = array('i')
+        self._trace_type = array('B')
         
         self.consensus_reached = False
         self.decided_value = None
+        # Simulated time (global_time) of the first preprepare2 decision, before the grace drain
+        self.decision_time = None
         self.message_count = 0
-        self.phase_counts = collections.defaultdict(int)
-        self.background_tasks = set()
+        # Message count per MsgType, indexed by MsgType.value (auto() numbers members from 1)
+        self.phase_counts = [0] * (len(MsgType) + 1)
+        
+        # Discrete-event queue: (time, seq, callback, args) ordered by simulated time.
+        # seq breaks ties in scheduling order so callbacks are never compared.
+        self.msg_queue = []
+        self._seq = 0
+        # Message handlers indexed by MsgType.value
+        self._dispatch = [None] * (len(MsgType) + 1)
+        self._dispatch[MsgType.REQUEST.value] = self._on_request
+        self._dispatch[MsgType.PREPREPARE1.value] = self._on_preprepare1
+        self._dispatch[MsgType.IN_PREPARE1.value] = self._on_in_prepare1
+        self._dispatch[MsgType.IN_PREPARE2.value] = self._on_in_prepare2
+        self._dispatch[MsgType.OUT_PREPARE.value] = self._on_out_prepare
+        self._dispatch[MsgType.COMMIT.value] = self._on_commit
+        self._dispatch[MsgType.PREPREPARE2.value] = self._on_preprepare2
 
     def _setup_nodes(self) -> List[Node]:
         nodes = []
         # Randomly select Byzantine nodes from the entire population
-        byz_indices = set(random.sample(range(self.config.n), self.config.actual_byzantine))
+        byz_indices = set(self._rng.sample(range(self.config.n), self.config.actual_byzantine))
 
         for i in range(self.config.n):
             is_byz = i in byz_indices
@@ -65,20 +122,34 @@ class NBFTSimulator:
             view_id, self.previous_hash, self.prev_primary_id
         )
         
-        # Identify Reps
-        self.reps = set()
-        # Reset Node roles for clean slate
-        for n in self.nodes:
-            n.is_group_representative = False
-            n.is_global_primary = False
+        # Reset Node roles for clean slate: only the previous view's Reps and Primary hold one
+        for rep_id in self.reps:
+            self.nodes[rep_id].is_group_representative = False
+        if self.prev_primary_id is not None:
+            self.nodes[self.prev_primary_id].is_global_primary = False
             
+        # Identify Reps (a tuple: the out-prepare broadcast target list, iterated every phase)
+        self.reps = tuple(g.representative_id for g in self.groups)
+        # node_id -> 1 if Representative in this view, read by the handlers instead of the Node attribute
+        self._is_rep = bytearray(self.config.n)
+        # node_id -> group_id as a plain list (-1 for the Global Primary) for the message handlers
+        self._group_of = [-1] * self.config.n
         for g in self.groups:
             self.nodes[g.representative_id].is_group_representative = True
-            self.reps.add(g.representative_id)
+            self._is_rep[g.representative_id] = 1
+            for nid in g.members:
+                self._group_of[nid] = g.group_id
+
+        # Group sizes, Reps and vote thresholds only depend on the view's grouping, so compute
+        # them once here instead of on every vote: R - w per group, and the commit threshold among Reps
+        self._group_size = [g.size for g in self.groups]
+        self._rep_of_group = list(self.reps)
+        self._threshold_by_group = [size - Analysis.calculate_w(size) for size in self._group_size]
+        self._commit_threshold = (len(self.reps) * 2) // 3
             
         self.nodes[self.global_primary_id].is_global_primary = True
         self.prev_primary_id = self.global_primary_id  # Store for next view setup if needed
-        self.log(f"View {view_id} Setup: Primary={self.global_primary_id}, Reps={self.reps}")
+        self.log("View %d Setup: Primary=%d, Reps=%s", view_id, self.global_primary_id, self.reps)
 
     def _apply_byzantine_strategies(self):
         # Post-process: If a randomly chosen Byzantine node happens to be a Rep,
@@ -87,76 +158,110 @@ class NBFTSimulator:
             if self.nodes[rep_id].is_byzantine:
                 self.nodes[rep_id].byzantine_strategy = "bad_aggregator"
 
-    def log(self, msg: str, source: str = "simulation", level: str = "INFO"):
-        if not hasattr(self, 'verbose_logging'): self.verbose_logging = True # Default or set in init
+    def log(self, msg: str, *args, source: str = "simulation", level: str = "INFO"):
+        # Batch runs disable logging; hot handlers also check self.verbose before formatting
+        if not self.verbose:
+            return
         
+        # %-style args are only formatted once we know the line is kept
+        if args:
+            msg = msg % args
         # In Single Simulation-> detailed logs.
         formatted_msg = f"{level} - {source} - {msg}"
         self.logs.append(formatted_msg)
 
+    def _schedule(self, delay: float, callback, *args):
+        """Queues callback(*args) to run at global_time + delay (simulated seconds)."""
+        self._seq += 1
+        heapq.heappush(self.msg_queue, (self.global_time + delay, self._seq, callback, args))
+
+    def _run_until(self, deadline: float, stop_at_consensus: bool = True):
+        """Processes scheduled events in simulated-time order up to the deadline."""
+        while self.msg_queue and self.msg_queue[0][0] <= deadline:
+            if stop_at_consensus and self.consensus_reached:
+                return
+            event_time, _, callback, args = heapq.heappop(self.msg_queue)
+            self.global_time = event_time
+            callback(*args)
+
     def send(self, sender: Node, target_id: int, msg: Message):
         # Log the send event
         # self.log(f"[{msg.msg_type.name}] Sent to node-{target_id}: {msg.digest[:10]}...", source=f"node-{sender.node_id}")
-        task = asyncio.create_task(self._async_send(sender, target_id, msg))
-        self.background_tasks.add(task)
-        task.add_done_callback(self.background_tasks.discard)
-
-    async def _async_send(self, sender: Node, target_id: int, msg: Message):
+        # Latency Emulation
+        latency = self.config.latency
+        
         # Special case: Sending to Client (ID -1)
         if target_id == -1:
-            latency = 0.001
-            await asyncio.sleep(latency)
-            current_time = time.time() - self.start_time
-            self.trace.append({
-                "time": current_time - latency,
-                "arrival": current_time,
-                "sender": sender.node_id,
-                "receiver": -1,
-                "type": msg.msg_type.name
-            })
+            self._schedule(latency, self._deliver_to_client, sender, msg, latency)
             return
 
-        target = self.nodes[target_id]
-        
-        final_msg = ByzantineBehavior.apply_behavior(sender, msg, target_id)
+        final_msg = ByzantineBehavior.apply_behavior(sender, msg, target_id) if sender.is_byzantine else msg
         if final_msg is None: return
 
-        # Latency Emulation
-        latency = 0.001 
-        await asyncio.sleep(latency)
-        
-        current_time = time.time() - self.start_time
-        arrival = current_time
-        
-        # Record trace
-        self.trace.append({
-            "time": current_time - latency, 
-            "arrival": arrival,
-            "sender": sender.node_id,
-            "receiver": target_id,
-            "type": msg.msg_type.name
-        })
-        
-        # Sign the digest as the unique content representative
-        signature = Message.sign(final_msg.digest, sender.node_id)
+        self._schedule(latency, self._deliver, sender, self.nodes[target_id], msg, final_msg, latency)
+
+    def multicast(self, sender: Node, target_ids, msg: Message):
+        """Sends msg to several nodes through one scheduled delivery instead of one event per target."""
+        latency = self.config.latency
+        deliveries = []
+        # Honest senders deliver msg unchanged, so only Byzantine ones go through the behavior hook
+        byzantine = sender.is_byzantine
+        for target_id in target_ids:
+            final_msg = ByzantineBehavior.apply_behavior(sender, msg, target_id) if byzantine else msg
+            if final_msg is not None:
+                deliveries.append((self.nodes[target_id], final_msg))
+        if deliveries:
+            self._schedule(latency, self._deliver_many, sender, msg, deliveries, latency)
+
+    def broadcast_all(self, sender: Node, msg: Message):
+        self.multicast(sender, range(self.config.n), msg)
+
+    def _deliver_many(self, sender: Node, msg: Message, deliveries, latency: float):
+        for target, final_msg in deliveries:
+            self._deliver(sender, target, msg, final_msg, latency)
+
+    def _record_trace(self, sender_id: int, receiver_id: int, msg: Message, latency: float):
+        self._trace_time.append(self.global_time - latency)
+        self._trace_arrival.append(self.global_time)
+        self._trace_sender.append(sender_id)
+        self._trace_receiver.append(receiver_id)
+        self._trace_type.append(msg.msg_type.value)
+
+    @property
+    def trace(self) -> List[dict]:
+        """The message trace as one dict per delivery, in the format the sequence chart expects."""
+        names = {t.value: t.name for t in MsgType}
+        return [
+            {"time": t, "arrival": a, "sender": s, "receiver": r, "type": names[k]}
+            for t, a, s, r, k in zip(self._trace_time, self._trace_arrival, self._trace_sender,
+                                     self._trace_receiver, self._trace_type)
+        ]
+
+    def _deliver_to_client(self, sender: Node, msg: Message, latency: float):
+        self._record_trace(sender.node_id, -1, msg, latency)
+
+    def _deliver(self, sender: Node, target: Node, msg: Message, final_msg: Message, latency: float):
+        """Records the arrival of a (possibly Byzantine-altered) message and hands it to the target."""
+        self._record_trace(sender.node_id, target.node_id, msg, latency)
         
-        cloned = Message(final_msg.msg_type, final_msg.sender_id, final_msg.view, 
-                         final_msg.sequence_number, final_msg.digest, final_msg.content, 
-                         signature=signature, weight=final_msg.weight)
+        # Messages are signed once by the sender and shared by all recipients.
+        # Only a copy altered by Byzantine behavior needs signing over its new digest.
+        if final_msg is not msg:
+            final_msg = replace(final_msg, signature=Message.sign(final_msg.digest, sender.node_id))
         
         self.message_count += 1
-        self.phase_counts[msg.msg_type.name] += 1
+        self.phase_counts[msg.msg_type.value] += 1
         
-        self._handle_message(target, cloned)
+        self._handle_message(target, final_msg)
 
     async def run(self) -> RunResult:
-        self.log("Starting NBFT simulation (Async)")
-        self.consensus_event = asyncio.Event()
-        self.start_time = time.time()
+        # Still a coroutine so the runner and UI can await it; the event heap never yields
+        self.log("Starting NBFT simulation")
+        self.start_time = time.perf_counter()
         
         current_view = 0
         max_views = 3 # Try up to View 2
-        
+
         while current_view < max_views and not self.consensus_reached:
             # Setup for current view
             if current_view > 0:
@@ -174,230 +279,218 @@ class NBFTSimulator:
                 
                 # New Primary announces NEW_VIEW
                 # self.send(new_prim, -1, Message(MsgType.NEW_VIEW, ...)) # trace only
-                self.log(f" STARTING VIEW {current_view}")
-                # Reset consensus event for the new view
-                self.consensus_event = asyncio.Event()
+                self.log(" STARTING VIEW %d", current_view)
                 # Clear node states for the new view to avoid stale data
-                self.node_states = {n.node_id: {} for n in self.nodes}
+                self.state.clear()
 
 
             # Start Consensus Protocol for this View
             gp = self.nodes[self.global_primary_id]
+            view_deadline = self.global_time + self._view_timeout
             
             # PHASE: preprepare1
             # 1. Client sends REQUEST to Global Primary
-            client_req = Message(MsgType.REQUEST, -1, current_view, 1, "digest_nbft", "VALUE_Y")
+            client_req = Message(MsgType.REQUEST, -1, current_view, 1, "digest_nbft", "VALUE_Y",
+                                 signature=Message.sign("digest_nbft", -1))
             self.send(Node(-1, ""), self.global_primary_id, client_req)
                 
-            try:
-                # Wait for consensus or timeout
-                # Customer terminal threshold: (n-1)/2 + 1
-                await asyncio.wait_for(self.consensus_event.wait(), timeout=3.0)
-                if self.consensus_reached:
-                    client_threshold = ((self.config.n - 1) // 2) + 1
-                    self.log(f"Consensus reached (Client Threshold: {client_threshold} replies received)")
-                    break
-            except asyncio.TimeoutError:
-                self.log(f"View {current_view} TIMEOUT.")
-                current_view += 1
-                if current_view < max_views:
-                    self.log(f" - STARTING VIEW {current_view}  ")
+            # Process events until consensus or timeout
+            # Customer terminal threshold: (n-1)/2 + 1
+            self._run_until(view_deadline)
+            if self.consensus_reached:
+                client_threshold = ((self.config.n - 1) // 2) + 1
+                self.log("Consensus reached (Client Threshold: %d replies received)", client_threshold)
+                break
+            
+            self.global_time = view_deadline
+            self.log("View %d TIMEOUT.", current_view)
+            current_view += 1
+            if current_view < max_views:
+                self.log(" - STARTING VIEW %d  ", current_view)
 
         if self.consensus_reached:
             # Short grace period to let final decision/reply messages finish tracing
-            await asyncio.sleep(0.1)
-
-        # Cleanup: Cancel any remaining background tasks
-        for task in self.background_tasks:
-            if not task.done():
-                task.cancel()
-        
-        if self.background_tasks:
-            await asyncio.gather(*self.background_tasks, return_exceptions=True)
+            self._run_until(self.global_time + _GRACE_HOPS * self.config.latency, stop_at_consensus=False)
 
-        duration = time.time() - self.start_time
+        duration = time.perf_counter() - self.start_time
         
         return RunResult(
             success=self.consensus_reached,
-            consensus_time=duration,
+            # Simulated seconds to the decision, including watchdog and view-change timeouts;
+            # a failed run reports the time its last view gave up
+            consensus_time=self.decision_time if self.consensus_reached else self.global_time,
             total_messages=self.message_count,
-            messages_per_phase=dict(self.phase_counts),
+            messages_per_phase={t.name: self.phase_counts[t.value] for t in MsgType if self.phase_counts[t.value]},
             decided_value=self.decided_value,
             logs=self.logs,
             message_trace=self.trace,
-            byzantine_nodes=[n.node_id for n in self.nodes if n.is_byzantine]
+            byzantine_nodes=[n.node_id for n in self.nodes if n.is_byzantine],
+            wall_time=duration
         )
 
-    async def _async_send_from_client(self, target_id: int, msg: Message):
-        """Special helper to simulate client broadcast in preprepare1."""
-        latency = 0.001
-        await asyncio.sleep(latency)
-        current_time = time.time() - self.start_time
-        self.trace.append({
-            "time": current_time - latency,
-            "arrival": current_time,
-            "sender": -1,
-            "receiver": target_id,
-            "type": msg.msg_type.name
-        })
-        self._handle_message(self.nodes[target_id], msg)
-
     def _handle_message(self, node: Node, msg: Message):
-        key = (msg.view, msg.sequence_number)
-        if key not in self.node_states[node.node_id]:
-            self.node_states[node.node_id][key] = {
-                "in_prepare1_votes": set(), # Rep collecting from members
-                "out_prepare_votes": {},    # Rep collecting from other nodes (NodeID -> Weight)
-                "processed_sources": set(), # Prevent double counting from same groups
-                "commit_votes": set(),      # Node 0 collecting from Reps
-                "state": ConsensusState.IDLE,
-                "intra_group_done": False,
-                "inter_group_done": False,
-                "watchdog_triggered": False,
-                "proposal_value": None
-            }
+        if self.consensus_reached and msg.msg_type in _LATE_VOTE_TYPES:
+            return
         
-        st = self.node_states[node.node_id][key]
+        key = (node.node_id, msg.view, msg.sequence_number)
+        st = self.state.get(key)
+        if st is None:
+            st = self.state[key] = _new_state()
         
-        # 0. REQUEST (Client -> Global Primary)
-        if msg.msg_type == MsgType.REQUEST:
-            if node.node_id == self.global_primary_id:
-                self.log(f"[REQUEST] Global Primary received client request. Broadcasting PREPREPARE1 to all nodes.", source=f"node-{node.node_id}")
-                st["proposal_value"] = msg.content
-                broadcast_msg = Message(MsgType.PREPREPARE1, node.node_id, msg.view, msg.sequence_number, msg.digest, content=msg.content)
-                for other_node in self.nodes:
-                    self.send(node, other_node.node_id, broadcast_msg)
+        handler = self._dispatch[msg.msg_type.value]
+        if handler:
+            handler(node, msg, st)
 
-        # 1. preprepare1 (Global Primary -> All Nodes)
-        elif msg.msg_type == MsgType.PREPREPARE1:
+    # 0. REQUEST (Client -> Global Primary)
+    def _on_request(self, node: Node, msg: Message, st: dict):
+        if node.node_id == self.global_primary_id:
+            if self.verbose:
+                self.log(f"[REQUEST] Global Primary received client request. Broadcasting PREPREPARE1 to all nodes.", source=f"node-{node.node_id}")
             st["proposal_value"] = msg.content
-            
-            # Every node (if in a group) sends in-prepare1 to its group representative
-            gid = self.node_group_map.get(node.node_id, -1)
-            if gid != -1:
-                rep_id = self.groups[gid].representative_id
+            broadcast_msg = Message(MsgType.PREPREPARE1, node.node_id, msg.view, msg.sequence_number, msg.digest, content=msg.content,
+                                    signature=Message.sign(msg.digest, node.node_id))
+            self.broadcast_all(node, broadcast_msg)
+
+    # 1. preprepare1 (Global Primary -> All Nodes)
+    def _on_preprepare1(self, node: Node, msg: Message, st: dict):
+        st["proposal_value"] = msg.content
+
+        # Every node (if in a group) sends in-prepare1 to its group representative
+        gid = self._group_of[node.node_id]
+        if gid != -1:
+            rep_id = self._rep_of_group[gid]
+            if self.verbose:
                 self.log(f"[preprepare1] Received broadcast. Sending in-prepare1 to Rep {rep_id}", source=f"node-{node.node_id}")
-                in_prep1 = Message(MsgType.IN_PREPARE1, node.node_id, msg.view, msg.sequence_number, msg.digest, content=msg.content)
-                self.send(node, rep_id, in_prep1)
-                
-                # Algorithm 1: Watchdog Timer
-                # Start a watchdog to wait for in-prepare2 from the Representative
-                watchdog_task = asyncio.create_task(self._watchdog_timer(node, msg, rep_id))
-                self.background_tasks.add(watchdog_task)
-                watchdog_task.add_done_callback(self.background_tasks.discard)
-            else:
+            in_prep1 = Message(MsgType.IN_PREPARE1, node.node_id, msg.view, msg.sequence_number, msg.digest, content=msg.content,
+                               signature=Message.sign(msg.digest, node.node_id))
+            self.send(node, rep_id, in_prep1)
+
+            # Algorithm 1: Watchdog Timer
+            # Start a watchdog to wait for in-prepare2 from the Representative
+            # Simulated timeout based on protocol parameters
+            self._schedule(self._watchdog_delay, self._watchdog_timer, node, msg, rep_id)
+        else:
+            if self.verbose:
                 self.log(f"[preprepare1] Global Primary {node.node_id} skipping intra-group step.", source=f"node-{node.node_id}")
 
-        # 2. in-prepare1 (Node -> Representative)
-        elif msg.msg_type == MsgType.IN_PREPARE1:
-            if node.is_group_representative:
-                st["in_prepare1_votes"].add(msg.sender_id)
-                st["proposal_value"] = msg.content
-                
-                group_id = self.node_group_map[node.node_id]
-                group_size = self.groups[group_id].size
-                threshold = group_size - Analysis.calculate_w(group_size)
-                
-                if len(st["in_prepare1_votes"]) >= threshold and not st["intra_group_done"]:
-                    # Threshold Vote-Counting Model
-                    # Reached FULL local consensus
-                    st["intra_group_done"] = True
-                    vote_weight = group_size
+    # 2. in-prepare1 (Node -> Representative)
+    def _on_in_prepare1(self, node: Node, msg: Message, st: dict):
+        if self._is_rep[node.node_id]:
+            bit = 1 << msg.sender_id
+            if not st["in_prepare1_mask"] & bit:
+                st["in_prepare1_mask"] |= bit
+                st["in_prepare1_count"] += 1
+            st["proposal_value"] = msg.content
+
+            group_id = self._group_of[node.node_id]
+
+            if st["in_prepare1_count"] >= self._threshold_by_group[group_id] and not st["intra_group_done"]:
+                # Threshold Vote-Counting Model
+                # Reached FULL local consensus
+                st["intra_group_done"] = True
+                vote_weight = self._group_size[group_id]
+                if self.verbose:
                     self.log(f"[in-prepare1] Group {group_id} reached FULL threshold. Weight={vote_weight}", source=f"node-{node.node_id}")
-                    
-                    # in-prepare2: Representative -> All group nodes (Confirmation)
-                    in_prep2 = Message(MsgType.IN_PREPARE2, node.node_id, msg.view, msg.sequence_number, msg.digest, content=msg.content)
-                    for member_id in self.groups[group_id].members:
-                        self.send(node, member_id, in_prep2)
-                    
-                    # out-prepare: Representatives cross-talk with assigned weight
-                    out_prep = Message(MsgType.OUT_PREPARE, node.node_id, msg.view, msg.sequence_number, msg.digest, content=msg.content, weight=vote_weight)
-                    for r_id in self.reps:
-                        self.send(node, r_id, out_prep)
-
-        # 3. in-prepare2 (Representative -> Group Nodes)
-        elif msg.msg_type == MsgType.IN_PREPARE2:
-            # Algorithm 1 verification
-            is_consistent = (msg.content == st["proposal_value"])
-            
-            if is_consistent:
+
+                # in-prepare2: Representative -> All group nodes (Confirmation)
+                signature = Message.sign(msg.digest, node.node_id)
+                in_prep2 = Message(MsgType.IN_PREPARE2, node.node_id, msg.view, msg.sequence_number, msg.digest, content=msg.content,
+                                   signature=signature)
+                self.multicast(node, self.groups[group_id].members, in_prep2)
+
+                # out-prepare: Representatives cross-talk with assigned weight
+                out_prep = Message(MsgType.OUT_PREPARE, node.node_id, msg.view, msg.sequence_number, msg.digest, content=msg.content,
+                                   signature=signature, weight=vote_weight)
+                self.multicast(node, self.reps, out_prep)
+
+    # 3. in-prepare2 (Representative -> Group Nodes)
+    def _on_in_prepare2(self, node: Node, msg: Message, st: dict):
+        # Algorithm 1 verification
+        is_consistent = (msg.content == st["proposal_value"])
+
+        if is_consistent:
+            if self.verbose:
                 self.log(f"[in-prepare2] Received valid confirmation from Rep. Watchdog satisfied.", source=f"node-{node.node_id}")
-                st["intra_group_done"] = True
-                st["state"] = ConsensusState.PRE_PREPARED
-            else:
+            st["intra_group_done"] = True
+            st["state"] = ConsensusState.PRE_PREPARED
+        else:
+            if self.verbose:
                 self.log(f"[in-prepare2] ALARM! Inconsistent message from Rep {msg.sender_id}. Triggering emergency broadcast.", source=f"node-{node.node_id}")
-                self._trigger_watchdog_broadcast(node, msg)
+            self._trigger_watchdog_broadcast(node, msg)
 
-        # 4. out-prepare (Representative -> All Representatives)
-        elif msg.msg_type == MsgType.OUT_PREPARE:
-            if node.is_group_representative:
-                sender_group = self.node_group_map[msg.sender_id]
-                
-                # If we get a message from a Representative, it represents the whole group (weight R)
-                # If it's a watchdog broadcast from a member, it's weight 1.
-                # "otherwise, the number of valid signatures is calculated as the number of votes."
-                st["out_prepare_votes"][msg.sender_id] = msg.weight
-                
-                # Check Global Consensus
-                current_weight = sum(st["out_prepare_votes"].values())
-                required_weight = (2 * self.config.n) // 3
-                
-                if current_weight > required_weight and not st["inter_group_done"]:
-                    st["inter_group_done"] = True
-                    st["state"] = ConsensusState.PREPARED
+    # 4. out-prepare (Representative -> All Representatives)
+    def _on_out_prepare(self, node: Node, msg: Message, st: dict):
+        if self._is_rep[node.node_id]:
+            # If we get a message from a Representative, it represents the whole group (weight R)
+            # If it's a watchdog broadcast from a member, it's weight 1.
+            # "otherwise, the number of valid signatures is calculated as the number of votes."
+            votes = st["out_prepare_votes"]
+            st["out_prepare_weight"] += msg.weight - votes.get(msg.sender_id, 0)
+            votes[msg.sender_id] = msg.weight
+
+            # Check Global Consensus
+            current_weight = st["out_prepare_weight"]
+
+            if current_weight > self._quorum_weight and not st["inter_group_done"]:
+                st["inter_group_done"] = True
+                st["state"] = ConsensusState.PREPARED
+                if self.verbose:
                     self.log(f"[out-prepare] Global weighted quorum reached ({current_weight}). Sending commit to Global Primary.", source=f"node-{node.node_id}")
-                    # commit: Representative -> Global Primary (Replica 0)
-                    commit_msg = Message(MsgType.COMMIT, node.node_id, msg.view, msg.sequence_number, msg.digest, content=msg.content)
-                    self.send(node, self.global_primary_id, commit_msg)
-
-        # 5. commit (Representatives -> Global Primary)
-        elif msg.msg_type == MsgType.COMMIT:
-            if node.node_id == self.global_primary_id: # Aggregator
-                st["commit_votes"].add(msg.sender_id)
-                
-                # Paper: Threshold analysis for inter-group consensus
-                threshold = (len(self.reps) * 2) // 3
-                
-                if len(st["commit_votes"]) > threshold and not self.consensus_reached:
-                    st["state"] = ConsensusState.COMMITTED
+                # commit: Representative -> Global Primary (Replica 0)
+                commit_msg = Message(MsgType.COMMIT, node.node_id, msg.view, msg.sequence_number, msg.digest, content=msg.content,
+                                     signature=Message.sign(msg.digest, node.node_id))
+                self.send(node, self.global_primary_id, commit_msg)
+
+    # 5. commit (Representatives -> Global Primary)
+    def _on_commit(self, node: Node, msg: Message, st: dict):
+        if node.node_id == self.global_primary_id: # Aggregator
+            bit = 1 << msg.sender_id
+            if not st["commit_mask"] & bit:
+                st["commit_mask"] |= bit
+                st["commit_count"] += 1
+
+            # Paper: Threshold analysis for inter-group consensus
+            if st["commit_count"] > self._commit_threshold and not self.consensus_reached:
+                st["state"] = ConsensusState.COMMITTED
+                if self.verbose:
                     self.log(f"[commit] Global Primary aggregated signatures. Broadcasting preprepare2 to whole network.", source=f"node-{node.node_id}")
-                    # preprepare2: Global Primary -> All nodes
-                    prep2 = Message(MsgType.PREPREPARE2, node.node_id, msg.view, msg.sequence_number, msg.digest, content=msg.content)
-                    for n in self.nodes:
-                        self.send(node, n.node_id, prep2)
-
-        # 6. preprepare2 (Replica 0 -> All Nodes)
-        elif msg.msg_type == MsgType.PREPREPARE2:
-            st["state"] = ConsensusState.DECIDED
+                # preprepare2: Global Primary -> All nodes
+                prep2 = Message(MsgType.PREPREPARE2, node.node_id, msg.view, msg.sequence_number, msg.digest, content=msg.content,
+                                signature=Message.sign(msg.digest, node.node_id))
+                self.broadcast_all(node, prep2)
+
+    # 6. preprepare2 (Replica 0 -> All Nodes)
+    def _on_preprepare2(self, node: Node, msg: Message, st: dict):
+        if st["state"] == ConsensusState.DECIDED:
+            return
+        st["state"] = ConsensusState.DECIDED
+        if self.verbose:
             self.log(f"[preprepare2] Global consensus finalized. Sending REPLY to Client.", source=f"node-{node.node_id}")
-            self.decided_value = msg.content
-            self.consensus_reached = True
-            self.consensus_event.set()
-            # Reply: All nodes -> Client
-            self.send(node, -1, Message(MsgType.REPLY, node.node_id, msg.view, msg.sequence_number, msg.digest, content=msg.content))
-
-    async def _watchdog_timer(self, node: Node, original_msg: Message, rep_id: int):
-        """Algorithm 1 Watchdog: Waits for the representative to broadcast the group decision."""
-        # Simulated timeout based on protocol parameters
-        await asyncio.sleep(0.5) 
-        
-        key = (original_msg.view, original_msg.sequence_number)
-        st = self.node_states[node.node_id].get(key)
+        self.decided_value = msg.content
+        if not self.consensus_reached:
+            self.decision_time = self.global_time
+        self.consensus_reached = True
+        # Reply: All nodes -> Client
+        self.send(node, -1, Message(MsgType.REPLY, node.node_id, msg.view, msg.sequence_number, msg.digest, content=msg.content))
+
+    def _watchdog_timer(self, node: Node, original_msg: Message, rep_id: int):
+        """Algorithm 1 Watchdog: Fires once the representative has had time to broadcast the group decision."""
+        st = self.state.get((node.node_id, original_msg.view, original_msg.sequence_number))
         
         # If the local group consensus hasn't finished, the representative is likely Byzantine/Silent
         if st and not st["intra_group_done"] and not st["watchdog_triggered"]:
-            self.log(f"[WATCHDOG] Rep {rep_id} TIMEOUT. Peer-to-Network broadcast triggered.", source=f"node-{node.node_id}")
+            if self.verbose:
+                self.log(f"[WATCHDOG] Rep {rep_id} TIMEOUT. Peer-to-Network broadcast triggered.", source=f"node-{node.node_id}")
             self._trigger_watchdog_broadcast(node, original_msg)
 
     def _trigger_watchdog_broadcast(self, node: Node, original_msg: Message):
         """Bypasses a faulty representative to send the node's vote directly to the network."""
-        key = (original_msg.view, original_msg.sequence_number)
-        st = self.node_states[node.node_id][key]
+        st = self.state[(node.node_id, original_msg.view, original_msg.sequence_number)]
         if st["watchdog_triggered"]: return
         st["watchdog_triggered"] = True
         
         # Consistent with Node Decision Broadcast Model: send individual vote (weight=1)
-        out_prep = Message(MsgType.OUT_PREPARE, node.node_id, original_msg.view, original_msg.sequence_number, original_msg.digest, content=st["proposal_value"], weight=1)
-        for r_id in self.reps:
-            self.send(node, r_id, out_prep)
+        out_prep = Message(MsgType.OUT_PREPARE, node.node_id, original_msg.view, original_msg.sequence_number, original_msg.digest, content=st["proposal_value"],
+                           signature=Message.sign(original_msg.digest, node.node_id), weight=1)
+        self.multicast(node, self.reps, out_prep)
 
@@ -1,7 +1,7 @@
-import collections
 from typing import List, Dict, Set, Optional
-import asyncio
+import heapq
 import time
+import random
 from .models import Node, Message, MsgType, RunConfig, RunResult, ConsensusState
 from .byzantine import ByzantineBehavior
 
@@ -12,25 +12,43 @@ class PBFTSimulator:
     """
     def __init__(self, config: RunConfig):
         self.config = config
+        self.verbose = config.verbose
+        # Per-run RNG so a fixed config.seed reproduces the same Byzantine selection
+        self._rng = random.Random(config.seed)
         self.nodes = self._setup_nodes()
         self.global_time = 0.0
         self.logs = []
         
-        # State tracking per node
-        # node_id -> { view -> { seq -> { phase -> count } } }
-        self.node_states = {n.node_id: {} for n in self.nodes}
+        # State tracking per (view, seq) slot, one list per field indexed by node_id
+        # (view, seq) -> { field -> [value for node 0..n-1] }
+        self.node_states = {}
         self.node_logs = {n.node_id: [] for n in self.nodes}
         
         self.consensus_reached = False
         self.decided_value = None
+        # Simulated time (global_time) at which the first honest replica committed
+        self.decision_time = None
         self.message_count = 0
-        self.phase_counts = collections.defaultdict(int)
+        # Threshold calculation: 2f + 1
+        self._quorum = 2 * ((self.config.n - 1) // 3) + 1
+        # Message count per MsgType, indexed by MsgType.value (auto() numbers members from 1)
+        self.phase_counts = [0] * (len(MsgType) + 1)
+        
+        # Discrete-event queue: (arrival_time, seq, target_id, msg) ordered by simulated arrival.
+        # seq breaks ties in send order so Message objects are never compared.
+        self.msg_queue = []
+        self._seq = 0
+
+        # Message handlers indexed by MsgType.value
+        self._dispatch = [None] * (len(MsgType) + 1)
+        self._dispatch[MsgType.PBFT_PRE_PREPARE.value] = self._on_pre_prepare
+        self._dispatch[MsgType.PBFT_PREPARE.value] = self._on_prepare
+        self._dispatch[MsgType.PBFT_COMMIT.value] = self._on_commit
 
     def _setup_nodes(self) -> List[Node]:
         nodes = []
-        import random
         # Randomly select Byzantine nodes to allow the Primary to be faulty.
-        byz_indices = set(random.sample(range(self.config.n), self.config.actual_byzantine))
+        byz_indices = set(self._rng.sample(range(self.config.n), self.config.actual_byzantine))
         
         for i in range(self.config.n):
             is_byz = i in byz_indices
@@ -44,40 +62,27 @@ class PBFTSimulator:
         return nodes
 
     def log(self, msg: str, source: str = "simulation", level: str = "INFO"):
-        if not hasattr(self, 'verbose_logging'): self.verbose_logging = True
+        if not self.verbose:
+            return
         formatted_msg = f"{level} - {source} - {msg}"
         self.logs.append(formatted_msg)
 
     def send_multicast(self, sender: Node, msg: Message):
-        for target in self.nodes:
-            asyncio.create_task(self._async_send(sender, target, msg))
-
-    async def _async_send(self, sender: Node, target: Node, msg: Message):
-        final_msg = ByzantineBehavior.apply_behavior(sender, msg, target.node_id)
-        if final_msg is None: return
-        
         # Latency model
-        latency = 0.001
-        await asyncio.sleep(latency)
-        
-        cloned_msg = Message(
-            msg_type=final_msg.msg_type,
-            sender_id=final_msg.sender_id,
-            view=final_msg.view,
-            sequence_number=final_msg.sequence_number,
-            digest=final_msg.digest,
-            content=final_msg.content
-        )
+        latency = self.config.latency
+        arrival = self.global_time + latency
         
-        self.message_count += 1
-        self.phase_counts[msg.msg_type.name] += 1
-        
-        self._handle_message(target, cloned_msg)
+        # Honest senders deliver msg unchanged, so only Byzantine ones go through the behavior hook
+        byzantine = sender.is_byzantine
+        for target in self.nodes:
+            final_msg = ByzantineBehavior.apply_behavior(sender, msg, target.node_id) if byzantine else msg
+            if final_msg is None: continue
+            self._seq += 1
+            heapq.heappush(self.msg_queue, (arrival, self._seq, target.node_id, final_msg))
 
     async def run(self) -> RunResult:
-        self.log("Starting PBFT simulation (Async)", source="simulation")
-        self.consensus_event = asyncio.Event()
-        self.start_time = time.time()
+        self.log("Starting PBFT simulation", source="simulation")
+        self.start_time = time.perf_counter()
         
         primary_id = 0 
         req_msg = Message(MsgType.PBFT_PRE_PREPARE, primary_id, 0, 1, "digest_req", "VALUE_X")
@@ -86,84 +91,123 @@ class PBFTSimulator:
         
         self.send_multicast(primary, req_msg)
         
-        try:
-            await asyncio.wait_for(self.consensus_event.wait(), timeout=5.0)
-        except asyncio.TimeoutError:
-            self.log("Simulation timed out", source="simulation", level="ERROR")
+        # Deliver messages in arrival order until nothing is left in flight.
+        # Once consensus is reached, finish the deliveries arriving at that same instant and stop.
+        # Hot loop: bind lookups to locals and count into a local tally, flushed once at the end
+        queue, nodes, handle = self.msg_queue, self.nodes, self._handle_message
+        phase_counts = self.phase_counts
+        delivered = 0
+        while queue:
+            if self.consensus_reached and queue[0][0] > self.global_time:
+                break
+            arrival, _, target_id, final_msg = heapq.heappop(queue)
+            self.global_time = arrival
+            
+            delivered += 1
+            phase_counts[final_msg.msg_type.value] += 1
             
-        duration = time.time() - self.start_time
+            # Messages are immutable, so every recipient can share the sender's instance
+            handle(nodes[target_id], final_msg)
+        self.message_count += delivered
+        
+        if not self.consensus_reached:
+            self.log("Simulation timed out", source="simulation", level="ERROR")
                 
+        duration = time.perf_counter() - self.start_time
+        
         return RunResult(
             success=self.consensus_reached,
-            consensus_time=duration,
+            # Simulated seconds to the decision; a failed run reports when its last message arrived
+            consensus_time=self.decision_time if self.consensus_reached else self.global_time,
             total_messages=self.message_count,
-            messages_per_phase=dict(self.phase_counts),
+            messages_per_phase={t.name: self.phase_counts[t.value] for t in MsgType if self.phase_counts[t.value]},
             decided_value=self.decided_value,
             logs=self.logs,
             message_trace=[],
-            byzantine_nodes=[n.node_id for n in self.nodes if n.is_byzantine]
+            byzantine_nodes=[n.node_id for n in self.nodes if n.is_byzantine],
+            wall_time=duration
         )
 
+    def _new_slot(self) -> dict:
+        n = self.config.n
+        return {
+            "pre_prepare": [False] * n,
+            "prepare_mask": [0] * n,    # Bit per sender id
+            "commit_mask": [0] * n,
+            "prepare_count": [0] * n,   # Distinct senders seen in each mask
+            "commit_count": [0] * n,
+            "state": [ConsensusState.IDLE] * n,
+            "proposal_value": [None] * n
+        }
+
     def _handle_message(self, node: Node, msg: Message):
+        # Deliveries still arriving at the instant consensus was reached are counted but not processed
+        if self.consensus_reached:
+            return
         if node.is_byzantine and node.byzantine_strategy == "silent":
              # Silent nodes might receive but don't process/act (simplified)
              return
              
-        # Threshold calculation: 2f + 1
-        f = (self.config.n - 1) // 3
-        quorum = 2 * f + 1
-        
         # Initialize state storage for this view/seq if needed
         state_key = (msg.view, msg.sequence_number)
-        if state_key not in self.node_states[node.node_id]:
-            self.node_states[node.node_id][state_key] = {
-                "pre_prepare": False,
-                "prepare_votes": set(),
-                "commit_votes": set(),
-                "state": ConsensusState.IDLE,
-                "proposal_value": None
-            }
+        slot = self.node_states.get(state_key)
+        if slot is None:
+            slot = self.node_states[state_key] = self._new_slot()
         
-        st = self.node_states[node.node_id][state_key]
-        
-        # Logic Flow
-        if msg.msg_type == MsgType.PBFT_PRE_PREPARE:
-            if st["state"] == ConsensusState.IDLE:
-                st["state"] = ConsensusState.PRE_PREPARED
-                st["pre_prepare"] = True
-                st["proposal_value"] = msg.content
-                
+        handler = self._dispatch[msg.msg_type.value]
+        if handler:
+            handler(node, msg, slot)
+
+    def _on_pre_prepare(self, node: Node, msg: Message, slot: dict):
+        i = node.node_id
+        if slot["state"][i] == ConsensusState.IDLE:
+            slot["state"][i] = ConsensusState.PRE_PREPARED
+            slot["pre_prepare"][i] = True
+            slot["proposal_value"][i] = msg.content
+
+            if self.verbose:
                 self.log(f"Received PrePrepare with value: {msg.content}", source=f"node-{node.node_id}")
 
-                # Broadcast PREPARE
-                reply = Message(MsgType.PBFT_PREPARE, node.node_id, msg.view, msg.sequence_number, msg.digest, content=msg.content)
-                self.send_multicast(node, reply)
-                
-        elif msg.msg_type == MsgType.PBFT_PREPARE:
-            st["prepare_votes"].add(msg.sender_id)
-            if len(st["prepare_votes"]) >= quorum and st["state"] == ConsensusState.PRE_PREPARED:
-                st["state"] = ConsensusState.PREPARED
-                
-                self.log(f"Prepared (Votes: {len(st['prepare_votes'])} >= Threshold: {quorum})", source=f"node-{node.node_id}")
+            # Broadcast PREPARE
+            reply = Message(MsgType.PBFT_PREPARE, node.node_id, msg.view, msg.sequence_number, msg.digest, content=msg.content)
+            self.send_multicast(node, reply)
 
-                # Broadcast COMMIT
-                commit = Message(MsgType.PBFT_COMMIT, node.node_id, msg.view, msg.sequence_number, msg.digest, content=st["proposal_value"])
-                self.send_multicast(node, commit)
-                
-        elif msg.msg_type == MsgType.PBFT_COMMIT:
-            st["commit_votes"].add(msg.sender_id)
-            if len(st["commit_votes"]) >= quorum and st["state"] == ConsensusState.PREPARED:
-                st["state"] = ConsensusState.COMMITTED
-                # Execute/Decide
-                # For simulation, if >= f+1 honest nodes decide, we consider it global success
-                # if ANY honest node decides
-                self.decided_value = st["proposal_value"] or "VALUE_X"
-                
-                if not node.is_byzantine:
-                    if not self.consensus_reached:
-                         self.log(f"Reached Consensus on: {self.decided_value}", source=f"node-{node.node_id}")
-                         # Log global success once
-                         self.log(f"[GLOBAL] Consensus reached: value='{self.decided_value}'", source="simulation")
-                    
-                    self.consensus_reached = True
-                    self.consensus_event.set()
+    def _on_prepare(self, node: Node, msg: Message, slot: dict):
+        i = node.node_id
+        masks, counts = slot["prepare_mask"], slot["prepare_count"]
+        bit = 1 << msg.sender_id
+        if not masks[i] & bit:
+            masks[i] |= bit
+            counts[i] += 1
+        if counts[i] >= self._quorum and slot["state"][i] == ConsensusState.PRE_PREPARED:
+            slot["state"][i] = ConsensusState.PREPARED
+
+            if self.verbose:
+                self.log(f"Prepared (Votes: {counts[i]} >= Threshold: {self._quorum})", source=f"node-{node.node_id}")
+
+            # Broadcast COMMIT
+            commit = Message(MsgType.PBFT_COMMIT, node.node_id, msg.view, msg.sequence_number, msg.digest, content=slot["proposal_value"][i])
+            self.send_multicast(node, commit)
+
+    def _on_commit(self, node: Node, msg: Message, slot: dict):
+        i = node.node_id
+        masks, counts = slot["commit_mask"], slot["commit_count"]
+        bit = 1 << msg.sender_id
+        if not masks[i] & bit:
+            masks[i] |= bit
+            counts[i] += 1
+        if counts[i] >= self._quorum and slot["state"][i] == ConsensusState.PREPARED:
+            slot["state"][i] = ConsensusState.COMMITTED
+            # Execute/Decide
+            # For simulation, if >= f+1 honest nodes decide, we consider it global success
+            # if ANY honest node decides
+            self.decided_value = slot["proposal_value"][i] or "VALUE_X"
+
+            if not node.is_byzantine:
+                if not self.consensus_reached:
+                     self.decision_time = self.global_time
+                     self.log(f"Reached Consensus on: {self.decided_value}", source=f"node-{node.node_id}")
+                     # Log global success once
+                     self.log(f"[GLOBAL] Consensus reached: value='{self.decided_value}'", source="simulation")
+
+                self.consensus_reached = True
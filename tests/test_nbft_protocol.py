@@ -1,11 +1,11 @@
 import unittest
-import asyncio
+from dataclasses import replace
 from nbft.models import Node, RunConfig, MsgType
 from nbft.consistent_hash import ConsistentHashing
 from nbft.analysis import Analysis
 from nbft.nbft_sim import NBFTSimulator
 
-class TestNBFTProtocol(unittest.TestCase):
+class TestNBFTProtocol(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
         # Setup a basic 10-node network with 3 groups for testing
         self.n = 10
@@ -24,12 +24,14 @@ class TestNBFTProtocol(unittest.TestCase):
     def test_consistent_hashing_determinism(self):
         """Verify that group formation is deterministic for a given view."""
         print("\n Testing Consistent Hashing Determinism ")
-        groups1, map1 = self.ch.form_groups(view_number=0)
-        groups2, map2 = self.ch.form_groups(view_number=0)
+        groups1, map1, primary1 = self.ch.form_groups(view_number=0)
+        # An independently built ring must produce the same grouping
+        groups2, map2, primary2 = ConsistentHashing(self.nodes, self.m).form_groups(view_number=0)
         
         # Check if same view gives same results
         self.assertEqual(len(groups1), self.m)
         self.assertEqual(map1, map2)
+        self.assertEqual(primary1, primary2)
         
         for i in range(self.m):
             self.assertEqual(groups1[i].representative_id, groups2[i].representative_id)
@@ -76,21 +78,11 @@ class TestNBFTProtocol(unittest.TestCase):
         print(f"n=100, m=10 -> R={R_large}, w={w_large}")
         self.assertEqual(w_large, 2)
 
-    def test_simulation_honest_consensus(self):
+    async def test_simulation_honest_consensus(self):
         """Run a full simulation with honest nodes to verify the end-to-end path."""
         print("\n Testing End-to-End Simulation (Honest) ")
         
-        async def run_sim():
-            sim = NBFTSimulator(self.config)
-            # Run simulation
-            result = await sim.run()
-            return result
-
-        # Run async code in sync test
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(run_sim())
-        loop.close()
+        result = await NBFTSimulator(self.config).run()
 
         print(f"Simulation Success: {result.success}")
         print(f"Decided Value: {result.decided_value}")
@@ -98,6 +90,9 @@ class TestNBFTProtocol(unittest.TestCase):
 
         self.assertTrue(result.success, "Simulation should succeed with 0 Byzantine nodes.")
         self.assertEqual(result.decided_value, "VALUE_Y")
+        # Decided on the simulated clock: request, preprepare1, in-prepare1, out-prepare
+        # (sent alongside in-prepare2), commit and preprepare2 are one hop each
+        self.assertAlmostEqual(result.consensus_time, 6 * self.config.latency)
         
         # Check if all phases were covered
         phases = result.messages_per_phase.keys()
@@ -109,5 +104,43 @@ class TestNBFTProtocol(unittest.TestCase):
         self.assertIn("COMMIT", phases)
         self.assertIn("PREPREPARE2", phases)
 
+    async def test_seeded_run_reproducible(self):
+        """Two runs with the same seed pick the same Byzantine nodes and exchange the same messages."""
+        print("\n Testing Seeded Reproducibility ")
+        config = replace(self.config, actual_byzantine=3, seed=7)
+
+        first = await NBFTSimulator(config).run()
+        second = await NBFTSimulator(config).run()
+
+        print(f"Byzantine Nodes: {first.byzantine_nodes}")
+        self.assertEqual(len(first.byzantine_nodes), 3)
+        self.assertEqual(first.byzantine_nodes, second.byzantine_nodes)
+        self.assertEqual(first.success, second.success)
+        self.assertEqual(first.messages_per_phase, second.messages_per_phase)
+
+    async def test_latency_scales_timers(self):
+        """Watchdog and view timeout are counted in hops, so a slow honest network decides without false alarms."""
+        print("\n Testing NBFT Timers Under High Latency ")
+        baseline = await NBFTSimulator(self.config).run()
+
+        # 0.3 s and 0.6 s per hop: past the 0.5 s watchdog and 3 s view timeout of the default latency
+        for latency in (0.01, 0.3, 0.6):
+            with self.subTest(latency=latency):
+                result = await NBFTSimulator(replace(self.config, latency=latency)).run()
+
+                print(f"latency={latency}: decided at {result.consensus_time:.4f}s")
+                self.assertTrue(result.success)
+                self.assertAlmostEqual(result.consensus_time, 6 * latency)
+                self.assertFalse([line for line in result.logs if "[WATCHDOG]" in line])
+                # Latency only shifts the timeline; the message pattern is unchanged
+                self.assertEqual(result.messages_per_phase, baseline.messages_per_phase)
+
+    def test_latency_must_be_positive(self):
+        """Zero or negative latency would collapse every protocol timer onto the send time."""
+        for latency in (0.0, -0.001):
+            with self.subTest(latency=latency):
+                with self.assertRaises(ValueError):
+                    replace(self.config, latency=latency)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from dataclasses import replace
+from nbft.models import RunConfig
+from nbft.pbft_sim import PBFTSimulator
+
+class TestPBFTProtocol(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # Setup a basic 10-node PBFT network
+        self.n = 10
+        self.config = RunConfig(
+            algorithm="PBFT",
+            n=self.n,
+            m=1,
+            f=3,
+            actual_byzantine=0,
+            client_requests=1
+        )
+
+    async def test_simulation_honest_consensus(self):
+        """Run a full PBFT simulation with honest nodes."""
+        print("\n Testing PBFT End-to-End Simulation (Honest) ")
+        result = await PBFTSimulator(self.config).run()
+
+        print(f"Simulation Success: {result.success}")
+        print(f"Total Messages: {result.total_messages}")
+
+        self.assertTrue(result.success, "Simulation should succeed with 0 Byzantine nodes.")
+        self.assertEqual(result.decided_value, "VALUE_X")
+        # Every phase is a full broadcast: n pre-prepares + n^2 prepares + n^2 commits
+        self.assertEqual(result.total_messages, self.n + 2 * self.n * self.n)
+        self.assertEqual(result.messages_per_phase["PBFT_PRE_PREPARE"], self.n)
+        # Decided on the simulated clock: pre-prepare, prepare and commit are one hop each
+        self.assertAlmostEqual(result.consensus_time, 3 * self.config.latency)
+
+    async def test_decision_time_follows_latency(self):
+        """PBFT has no timers, so any latency just stretches the three broadcast rounds."""
+        print("\n Testing PBFT Configurable Latency ")
+        for latency in (0.01, 0.3, 0.6):
+            with self.subTest(latency=latency):
+                result = await PBFTSimulator(replace(self.config, latency=latency)).run()
+
+                print(f"latency={latency}: decided at {result.consensus_time:.4f}s")
+                self.assertTrue(result.success)
+                self.assertAlmostEqual(result.consensus_time, 3 * latency)
+                self.assertEqual(result.total_messages, self.n + 2 * self.n * self.n)
+
+    async def test_simulation_silent_primary(self):
+        """A silent primary never sends the pre-prepare, so the run ends without consensus."""
+        print("\n Testing PBFT Silent Primary ")
+        sim = PBFTSimulator(self.config)
+        sim.nodes[0].is_byzantine = True
+        sim.nodes[0].byzantine_strategy = "silent"
+        result = await sim.run()
+
+        print(f"Simulation Success: {result.success}")
+        self.assertFalse(result.success)
+        self.assertEqual(result.total_messages, 0)
+
+if __name__ == "__main__":
+    unittest.main()